@@ -0,0 +1,14 @@
+-- Migration: Make meta_agent_rankings unique per (agent_name, regime)
+-- Rankings are upserted in place instead of being deleted and reinserted
+
+-- Remove duplicate rankings, keeping the most recent row for each agent/regime
+-- (rows without created_at count as oldest)
+DELETE FROM meta_agent_rankings a
+USING meta_agent_rankings b
+WHERE a.agent_name = b.agent_name
+  AND a.regime = b.regime
+  AND (COALESCE(a.created_at, '-infinity'), a.ctid) < (COALESCE(b.created_at, '-infinity'), b.ctid);
+
+-- Unique index used as the ON CONFLICT target
+CREATE UNIQUE INDEX IF NOT EXISTS idx_meta_agent_rankings_agent_regime
+    ON meta_agent_rankings(agent_name, regime);
@@ -30,14 +30,10 @@ automated_rag_service: Optional[any] = None
 
 def init_services(**services):
     """Initialize all service references."""
-    global db_pool, real_data_service, enhanced_data_manager, alternative_data_manager
-    global data_quality_validator, advanced_ml_manager, model_interpretability
-    global real_time_learning_manager, agent_performance_service, agent_router_service
-    global execution_agent_service, rag_event_agent_service, rl_strategy_agent_service
-    global rl_data_collector, rl_training_service, meta_evaluation_service
-    global latent_pattern_service, individual_agent_service, ensemble_blender_service
-    global enhanced_forecasting_service, automated_rag_service
+    # Only the annotated service slots above may be set; check every name
+    # before assigning so a bad call leaves the references untouched.
+    unknown = sorted(set(services) - set(__annotations__))
+    if unknown:
+        raise ValueError(f"Unknown service references: {', '.join(unknown)}")
     
-    for key, value in services.items():
-        globals()[key] = value
-
+    globals().update(services)
@@ -7,6 +7,7 @@ tracking agent performance across different market regimes and making dynamic ro
 
 import asyncio
 import logging
+from contextlib import asynccontextmanager
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
@@ -15,12 +16,67 @@ import asyncpg
 import yfinance as yf
 from dataclasses import dataclass
 import json
-import random
+import time
 from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Connection pool sizing: one connection per background loop, with headroom
+# for concurrent summary requests
+POOL_MIN_SIZE = 4
+POOL_MAX_SIZE = 16
+POOL_MAX_INACTIVE_LIFETIME = 300
+POOL_STATEMENT_CACHE_SIZE = 1024
+
+# Seconds between ranking refreshes; rankings are reused for the same period
+RANKING_REFRESH_INTERVAL = 300
+
+# Ranking metrics; the first six are scored with _RANK_WEIGHTS, and response
+# time enters the score as 1 / (1 + response_time) so lower is better
+_RANKING_COLUMNS = ('accuracy', 'sharpe_ratio', 'total_return', 'win_rate',
+                    'confidence', 'response_time', 'max_drawdown')
+_RANK_WEIGHTS = np.array([0.25, 0.20, 0.20, 0.15, 0.10, 0.10])
+
+# Regime classification: volatility above _VOLATILE_THRESHOLD wins, otherwise the
+# 30-day trend is bucketed with searchsorted(side='right'). The nextafter bounds
+# keep exactly -2% and +5% in the 'trending' bucket, as strict comparisons would.
+_VOLATILE_THRESHOLD = 0.25
+_REGIME_TREND_THRESHOLDS = np.array([-0.05, np.nextafter(-0.02, 0), 0.02, np.nextafter(0.05, 1)])
+_REGIME_LABELS = ('bear', 'trending', 'neutral', 'trending', 'bull')
+_TREND_CONFIDENCE_SCALE = {'bull': 10, 'bear': 10, 'trending': 8}
+
+# Hot-path queries run every cycle; asyncpg's per-connection statement cache
+# already reuses their prepared statements since the SQL text never changes.
+_AGENT_SIGNAL_STATS_SQL = """
+    SELECT agent_name,
+           COUNT(*) AS total_predictions,
+           AVG((predicted_direction IS NOT DISTINCT FROM actual_direction)::int) AS accuracy,
+           AVG(confidence) AS avg_confidence
+    FROM (
+        SELECT agent_name, confidence, predicted_direction, actual_direction,
+               ROW_NUMBER() OVER (PARTITION BY agent_name ORDER BY created_at DESC) AS rn
+        FROM agent_signals 
+        WHERE agent_name = ANY($1::text[]) 
+        AND created_at >= NOW() - INTERVAL '7 days'
+    ) recent
+    WHERE rn <= 100
+    GROUP BY agent_name
+"""
+
+_REGIME_PERFORMANCE_SQL = """
+    SELECT agent_name, AVG(accuracy) AS accuracy,
+           AVG(sharpe_ratio) AS sharpe_ratio, AVG(total_return) AS total_return,
+           AVG(max_drawdown) AS max_drawdown, AVG(win_rate) AS win_rate,
+           AVG(confidence) AS confidence, AVG(response_time) AS response_time
+    FROM meta_agent_performance 
+    WHERE regime = $1 
+    AND created_at >= NOW() - INTERVAL '24 hours'
+    GROUP BY agent_name
+    ORDER BY agent_name
+"""
+
+@dataclass(slots=True, frozen=True)
 class AgentPerformance:
     """Represents agent performance metrics."""
     agent_name: str
@@ -34,7 +90,17 @@ class AgentPerformance:
     regime: str
     timestamp: datetime
 
-@dataclass
+@dataclass(slots=True, frozen=True)
+class RegimeSnapshot:
+    """Represents market regime indicators computed from one price history."""
+    regime: str
+    confidence: float
+    volatility: float
+    trend: float
+    volume_ratio: float
+    timestamp: datetime
+
+@dataclass(slots=True, frozen=True)
 class RotationDecision:
     """Represents an agent rotation decision."""
     decision_id: str
@@ -51,10 +117,22 @@ class MetaEvaluationService:
     Service for Meta-Evaluation Agent real data collection and analysis.
     """
     
-    def __init__(self, db_pool: asyncpg.Pool):
+    def __init__(self, db_pool: asyncpg.Pool, executor: Optional[ThreadPoolExecutor] = None):
         self.db_pool = db_pool
-        self.executor = ThreadPoolExecutor(max_workers=4)
+        self._owns_pool = False
+        if db_pool is not None and db_pool.get_max_size() < POOL_MIN_SIZE:
+            logger.warning(
+                f"Connection pool max_size={db_pool.get_max_size()} is below {POOL_MIN_SIZE}; "
+                "meta-evaluation background tasks will wait on each other for connections"
+            )
+        # Executor for blocking calls; None uses the event loop's shared default executor
+        self.executor = executor
+        
+        # Cap concurrent connection use, leaving two pool connections for other callers
+        pool_size = db_pool.get_max_size() if db_pool is not None else POOL_MIN_SIZE
+        self._db_sem = asyncio.Semaphore(max(1, pool_size - 2))
         self.is_running = False
+        self._tasks: List[asyncio.Task] = []
         
         # Agent names to track
         self.agents = [
@@ -63,11 +141,49 @@ class MetaEvaluationService:
             'EventImpactAgent', 'DayForecastAgent'
         ]
         
+        # Random generator for simulated metrics
+        self._rng = np.random.default_rng()
+        
         # Market regimes
         self.regimes = ['bull', 'bear', 'neutral', 'volatile', 'trending']
         
+        # Market data cache: (symbol, period, interval) -> (fetched_at, history)
+        self._yf_tickers: Dict[str, yf.Ticker] = {}
+        self._yf_cache: Dict[Tuple[str, str, str], Tuple[float, pd.DataFrame]] = {}
+        self._yf_inflight: Dict[Tuple[str, str, str], asyncio.Task] = {}
+        
+        # Latest regime snapshot shared by regime detection and analysis
+        self._last_snapshot: Optional[RegimeSnapshot] = None
+        self._last_snapshot_at = 0.0
+        
+        # Regime rankings cache: regime -> (computed_at, rankings)
+        self._rankings_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self._rankings_index_error_logged = False
+        
         logger.info("Meta-Evaluation Service initialized")
     
+    @classmethod
+    async def create(cls, dsn: Optional[str] = None,
+                     executor: Optional[ThreadPoolExecutor] = None,
+                     **pool_kwargs) -> 'MetaEvaluationService':
+        """Create the service with its own connection pool sized for its workload."""
+        pool_kwargs.setdefault('min_size', POOL_MIN_SIZE)
+        pool_kwargs.setdefault('max_size', POOL_MAX_SIZE)
+        pool_kwargs.setdefault('max_inactive_connection_lifetime', POOL_MAX_INACTIVE_LIFETIME)
+        pool_kwargs.setdefault('statement_cache_size', POOL_STATEMENT_CACHE_SIZE)
+        
+        db_pool = await asyncpg.create_pool(dsn, **pool_kwargs)
+        service = cls(db_pool, executor=executor)
+        service._owns_pool = True
+        return service
+    
+    @asynccontextmanager
+    async def _acquire(self):
+        """Acquire a pooled connection within the service's connection budget."""
+        async with self._db_sem:
+            async with self.db_pool.acquire() as conn:
+                yield conn
+    
     async def start_evaluation(self):
         """Start the meta-evaluation process."""
         if self.is_running:
@@ -78,16 +194,32 @@ class MetaEvaluationService:
         logger.info("Starting meta-evaluation...")
         
         # Start background tasks
-        asyncio.create_task(self._collect_agent_performance())
-        asyncio.create_task(self._analyze_agent_rankings())
-        asyncio.create_task(self._make_rotation_decisions())
-        asyncio.create_task(self._update_regime_analysis())
+        self._tasks = [
+            asyncio.create_task(self._collect_agent_performance()),
+            asyncio.create_task(self._analyze_agent_rankings()),
+            asyncio.create_task(self._make_rotation_decisions()),
+            asyncio.create_task(self._update_regime_analysis())
+        ]
     
     async def stop_evaluation(self):
         """Stop the meta-evaluation process."""
         self.is_running = False
+        
+        # Cancel background tasks so they don't sleep out their current interval
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        
         logger.info("Meta-evaluation stopped")
     
+    async def close(self):
+        """Stop the meta-evaluation process and release resources owned by the service."""
+        await self.stop_evaluation()
+        
+        if self._owns_pool:
+            await self.db_pool.close()
+    
     async def _collect_agent_performance(self):
         """Collect real agent performance metrics."""
         while self.is_running:
@@ -95,10 +227,36 @@ class MetaEvaluationService:
                 # Get current market regime
                 market_regime = await self._detect_market_regime()
                 
+                # Fetch recent signal statistics for all agents in one query
+                signal_stats = await self._fetch_agent_signal_stats()
+                
                 # Collect performance for each agent
-                for agent in self.agents:
-                    performance = await self._calculate_agent_performance(agent, market_regime)
-                    await self._store_agent_performance(performance)
+                if signal_stats is None:
+                    performances = [
+                        self._get_fallback_performance(agent, market_regime)
+                        for agent in self.agents
+                    ]
+                else:
+                    agent_stats = [signal_stats.get(agent) for agent in self.agents]
+                    has_signals = [bool(st and st['total_predictions']) for st in agent_stats]
+                    
+                    # Simulated metrics for all agents; response time range depends
+                    # on whether the agent has recent signals
+                    base_performances = self._rng.uniform(0.4, 0.7, size=len(self.agents)).tolist()
+                    response_times = self._rng.uniform(
+                        np.where(has_signals, 0.1, 0.5), np.where(has_signals, 2.0, 3.0)
+                    ).tolist()
+                    
+                    performances = [
+                        self._calculate_agent_performance(
+                            agent, market_regime, stats if has else None,
+                            base_performance, response_time
+                        )
+                        for agent, stats, has, base_performance, response_time in zip(
+                            self.agents, agent_stats, has_signals, base_performances, response_times
+                        )
+                    ]
+                await self._store_agent_performances(performances)
                 
                 logger.info(f"Collected performance metrics for {len(self.agents)} agents")
                 
@@ -115,17 +273,18 @@ class MetaEvaluationService:
             try:
                 # Calculate rankings for each regime
                 for regime in self.regimes:
-                    rankings = await self._calculate_regime_rankings(regime)
+                    # Always recompute; this also refreshes the rankings cache
+                    rankings = await self._calculate_regime_rankings(regime, ttl=0)
                     await self._store_agent_rankings(rankings, regime)
                 
                 logger.info("Updated agent rankings for all regimes")
                 
                 # Wait before next analysis
-                await asyncio.sleep(300)  # 5 minutes
+                await asyncio.sleep(RANKING_REFRESH_INTERVAL)
                 
             except Exception as e:
                 logger.error(f"Error analyzing agent rankings: {e}")
-                await asyncio.sleep(300)
+                await asyncio.sleep(RANKING_REFRESH_INTERVAL)
     
     async def _make_rotation_decisions(self):
         """Make dynamic agent rotation decisions."""
@@ -167,77 +326,143 @@ class MetaEvaluationService:
                 logger.error(f"Error updating regime analysis: {e}")
                 await asyncio.sleep(120)
     
+    async def _get_history(self, symbol: str, period: str, interval: str,
+                           ttl: float = 3600) -> pd.DataFrame:
+        """Get price history from yfinance, reusing a cached copy within the TTL."""
+        key = (symbol, period, interval)
+        cached = self._yf_cache.get(key)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        
+        # Concurrent callers share a single in-flight fetch per key
+        task = self._yf_inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fetch_history(symbol, period, interval))
+            self._yf_inflight[key] = task
+            task.add_done_callback(lambda _: self._yf_inflight.pop(key, None))
+        
+        # Shield so a cancelled caller doesn't cancel the fetch for the others
+        return await asyncio.shield(task)
+    
+    async def _fetch_history(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Fetch price history from yfinance and cache usable results."""
+        ticker = self._yf_tickers.get(symbol)
+        if ticker is None:
+            ticker = self._yf_tickers[symbol] = yf.Ticker(symbol)
+        # yfinance blocks on network I/O, so keep it off the event loop
+        loop = asyncio.get_running_loop()
+        hist = await loop.run_in_executor(
+            self.executor, partial(ticker.history, period=period, interval=interval)
+        )
+        
+        # Only cache usable data so an empty response is retried next cycle
+        if not hist.empty:
+            self._yf_cache[(symbol, period, interval)] = (time.monotonic(), hist)
+        return hist
+    
+    async def _compute_regime_snapshot(self, ttl: float = 60) -> Optional[RegimeSnapshot]:
+        """Compute regime indicators from SPY history, reusing a recent snapshot."""
+        if self._last_snapshot and time.monotonic() - self._last_snapshot_at < ttl:
+            return self._last_snapshot
+        
+        # Get real market data
+        hist = await self._get_history('SPY', period="30d", interval="1d")
+        if hist.empty:
+            return None
+        
+        # Calculate regime indicators, skipping partial bars with missing values
+        close = hist['Close'].dropna().to_numpy(dtype=np.float64)
+        if close.size < 3:
+            return None
+        returns = np.diff(close) / close[:-1]
+        volatility = returns.std(ddof=1) * np.sqrt(252)
+        trend = close[-1] / close[0] - 1
+        
+        # A non-finite indicator would otherwise classify as an arbitrary regime
+        if not (np.isfinite(volatility) and np.isfinite(trend)):
+            return None
+        
+        # Volume analysis
+        volume = hist['Volume'].dropna().to_numpy(dtype=np.float64)
+        avg_volume = volume.mean() if volume.size else 0.0
+        recent_volume = volume[-5:].mean() if volume.size else 0.0
+        volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1.0
+        
+        # Determine regime
+        if volatility > _VOLATILE_THRESHOLD:
+            regime = 'volatile'
+            confidence = min(0.95, volatility * 2)
+        else:
+            regime = _REGIME_LABELS[int(np.searchsorted(_REGIME_TREND_THRESHOLDS, trend, side='right'))]
+            if regime == 'neutral':
+                confidence = 0.8
+            else:
+                confidence = min(0.95, abs(trend) * _TREND_CONFIDENCE_SCALE[regime])
+        
+        snapshot = RegimeSnapshot(
+            regime=regime,
+            confidence=float(confidence),
+            volatility=float(volatility),
+            trend=float(trend),
+            volume_ratio=float(volume_ratio),
+            timestamp=datetime.now()
+        )
+        self._last_snapshot = snapshot
+        self._last_snapshot_at = time.monotonic()
+        return snapshot
+    
     async def _detect_market_regime(self) -> str:
         """Detect current market regime."""
         try:
-            # Get real market data
-            ticker = yf.Ticker('SPY')
-            hist = ticker.history(period="30d", interval="1d")
-            
-            if not hist.empty:
-                # Calculate regime indicators
-                returns = hist['Close'].pct_change().dropna()
-                volatility = returns.std() * np.sqrt(252)
-                trend = (hist['Close'].iloc[-1] / hist['Close'].iloc[0]) - 1
-                
-                # Determine regime based on indicators
-                if volatility > 0.25:
-                    return 'volatile'
-                elif trend > 0.05:
-                    return 'bull'
-                elif trend < -0.05:
-                    return 'bear'
-                elif abs(trend) < 0.02:
-                    return 'neutral'
-                else:
-                    return 'trending'
-            else:
-                return 'neutral'
+            snapshot = await self._compute_regime_snapshot()
+            return snapshot.regime if snapshot else 'neutral'
                 
         except Exception as e:
             logger.error(f"Error detecting market regime: {e}")
             return 'neutral'
     
-    async def _calculate_agent_performance(self, agent_name: str, regime: str) -> AgentPerformance:
-        """Calculate performance metrics for a specific agent."""
+    async def _fetch_agent_signal_stats(self) -> Optional[Dict[str, asyncpg.Record]]:
+        """Get prediction statistics over each agent's 100 most recent signals."""
         try:
-            # Get recent predictions for this agent
-            async with self.db_pool.acquire() as conn:
-                predictions = await conn.fetch("""
-                    SELECT confidence, predicted_direction, actual_direction, created_at
-                    FROM agent_signals 
-                    WHERE agent_name = $1 
-                    AND created_at >= NOW() - INTERVAL '7 days'
-                    ORDER BY created_at DESC
-                    LIMIT 100
-                """, agent_name)
+            async with self._acquire() as conn:
+                rows = await conn.fetch(_AGENT_SIGNAL_STATS_SQL, self.agents)
+            
+            return {row['agent_name']: row for row in rows}
             
-            if predictions:
+        except Exception as e:
+            logger.error(f"Error fetching agent signal statistics: {e}")
+            return None
+    
+    def _calculate_agent_performance(self, agent_name: str, regime: str,
+                                     stats: Optional[asyncpg.Record],
+                                     base_performance: float,
+                                     response_time: float) -> AgentPerformance:
+        """Calculate performance metrics for a specific agent.
+        
+        stats is None when the agent has no recent signals. base_performance and
+        response_time are pre-drawn simulated values; the base performance is
+        only used when stats is None.
+        """
+        try:
+            if stats is not None:
                 # Calculate metrics from predictions
-                total_predictions = len(predictions)
-                correct_predictions = sum(1 for p in predictions 
-                                        if p['predicted_direction'] == p['actual_direction'])
-                
-                accuracy = correct_predictions / total_predictions if total_predictions > 0 else 0.5
-                avg_confidence = np.mean([float(p['confidence']) for p in predictions])
+                accuracy = float(stats['accuracy'])
+                avg_confidence = float(stats['avg_confidence'])
                 
                 # Simulate additional metrics based on accuracy
                 sharpe_ratio = max(0, (accuracy - 0.5) * 4)  # Scale accuracy to Sharpe-like metric
                 total_return = (accuracy - 0.5) * 0.2  # Convert accuracy to return
                 max_drawdown = max(0, 0.1 - accuracy * 0.2)  # Higher accuracy = lower drawdown
                 win_rate = accuracy
-                response_time = random.uniform(0.1, 2.0)  # Simulated response time
                 
             else:
                 # Fallback metrics for agents without predictions
-                base_performance = random.uniform(0.4, 0.7)
                 accuracy = base_performance
                 sharpe_ratio = (base_performance - 0.5) * 2
                 total_return = (base_performance - 0.5) * 0.15
                 max_drawdown = 0.1 - base_performance * 0.15
                 win_rate = base_performance
                 avg_confidence = base_performance
-                response_time = random.uniform(0.5, 3.0)
             
             return AgentPerformance(
                 agent_name=agent_name,
@@ -254,67 +479,58 @@ class MetaEvaluationService:
             
         except Exception as e:
             logger.error(f"Error calculating performance for {agent_name}: {e}")
-            # Return fallback performance
-            return AgentPerformance(
-                agent_name=agent_name,
-                accuracy=0.5,
-                sharpe_ratio=0.0,
-                total_return=0.0,
-                max_drawdown=0.1,
-                win_rate=0.5,
-                confidence=0.5,
-                response_time=1.0,
-                regime=regime,
-                timestamp=datetime.now()
-            )
+            return self._get_fallback_performance(agent_name, regime)
+    
+    def _get_fallback_performance(self, agent_name: str, regime: str) -> AgentPerformance:
+        """Get fixed fallback performance when agent data could not be read."""
+        return AgentPerformance(
+            agent_name=agent_name,
+            accuracy=0.5,
+            sharpe_ratio=0.0,
+            total_return=0.0,
+            max_drawdown=0.1,
+            win_rate=0.5,
+            confidence=0.5,
+            response_time=1.0,
+            regime=regime,
+            timestamp=datetime.now()
+        )
     
-    async def _calculate_regime_rankings(self, regime: str) -> List[Dict[str, Any]]:
-        """Calculate agent rankings for a specific regime."""
+    async def _calculate_regime_rankings(self, regime: str,
+                                         ttl: float = RANKING_REFRESH_INTERVAL) -> List[Dict[str, Any]]:
+        """Calculate agent rankings for a specific regime, reusing recent results."""
+        cached = self._rankings_cache.get(regime)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
+        
         try:
-            # Get recent performance data for this regime
-            async with self.db_pool.acquire() as conn:
-                performances = await conn.fetch("""
-                    SELECT agent_name, accuracy, sharpe_ratio, total_return, 
-                           max_drawdown, win_rate, confidence, response_time
-                    FROM meta_agent_performance 
-                    WHERE regime = $1 
-                    AND created_at >= NOW() - INTERVAL '24 hours'
-                    ORDER BY created_at DESC
-                """, regime)
+            # Get recent performance data for this regime, one row per agent
+            async with self._acquire() as conn:
+                performances = await conn.fetch(_REGIME_PERFORMANCE_SQL, regime)
             
             if performances:
-                # Calculate composite scores
-                rankings = []
-                for perf in performances:
-                    # Weighted composite score
-                    composite_score = (
-                        float(perf['accuracy']) * 0.25 +
-                        float(perf['sharpe_ratio']) * 0.20 +
-                        float(perf['total_return']) * 0.20 +
-                        float(perf['win_rate']) * 0.15 +
-                        float(perf['confidence']) * 0.10 +
-                        (1.0 / (1.0 + float(perf['response_time']))) * 0.10  # Lower response time is better
-                    )
-                    
-                    rankings.append({
-                        'agent_name': perf['agent_name'],
-                        'composite_score': composite_score,
-                        'accuracy': float(perf['accuracy']),
-                        'sharpe_ratio': float(perf['sharpe_ratio']),
-                        'total_return': float(perf['total_return']),
-                        'max_drawdown': float(perf['max_drawdown']),
-                        'win_rate': float(perf['win_rate']),
-                        'confidence': float(perf['confidence']),
-                        'response_time': float(perf['response_time'])
-                    })
-                
-                # Sort by composite score
-                rankings.sort(key=lambda x: x['composite_score'], reverse=True)
+                # Load all metrics into one float matrix
+                metrics = np.array(
+                    [[perf[c] for c in _RANKING_COLUMNS] for perf in performances], dtype=np.float64
+                )
                 
-                # Add ranking positions
-                for i, ranking in enumerate(rankings):
-                    ranking['rank'] = i + 1
+                # Weighted composite score
+                scores = (
+                    metrics[:, :5] @ _RANK_WEIGHTS[:5] +
+                    _RANK_WEIGHTS[5] / (1.0 + metrics[:, 5])  # Lower response time is better
+                )
                 
+                # Sort by composite score and add ranking positions
+                order = np.argsort(-scores, kind='stable')
+                rankings = []
+                for rank, i in enumerate(order.tolist(), start=1):
+                    ranking = dict(zip(_RANKING_COLUMNS, metrics[i].tolist()))
+                    ranking['agent_name'] = performances[i]['agent_name']
+                    ranking['composite_score'] = float(scores[i])
+                    ranking['rank'] = rank
+                    rankings.append(ranking)
+                
+                self._rankings_cache[regime] = (time.monotonic(), rankings)
                 return rankings
             else:
                 # Fallback rankings
@@ -326,9 +542,12 @@ class MetaEvaluationService:
     
     def _get_fallback_rankings(self, regime: str) -> List[Dict[str, Any]]:
         """Get fallback rankings when no data is available."""
+        base_scores = self._rng.uniform(0.4, 0.8, size=len(self.agents)).tolist()
+        response_times = self._rng.uniform(0.5, 2.0, size=len(self.agents)).tolist()
+        
         rankings = []
         for i, agent in enumerate(self.agents):
-            base_score = random.uniform(0.4, 0.8)
+            base_score = base_scores[i]
             rankings.append({
                 'agent_name': agent,
                 'rank': i + 1,
@@ -339,7 +558,7 @@ class MetaEvaluationService:
                 'max_drawdown': 0.1 - base_score * 0.15,
                 'win_rate': base_score,
                 'confidence': base_score,
-                'response_time': random.uniform(0.5, 2.0)
+                'response_time': response_times[i]
             })
         
         # Sort by composite score
@@ -361,25 +580,21 @@ class MetaEvaluationService:
                 return None
             
             # Get currently active agents (simulated)
-            current_agents = ['ForecastAgent', 'MomentumAgent', 'VolatilityAgent']
+            current_agents = {'ForecastAgent', 'MomentumAgent', 'VolatilityAgent'}
             
-            # Find best performing agent not currently active
-            best_agent = rankings[0]['agent_name']
-            worst_active_agent = None
+            # Rankings are sorted, so the best agent is first
+            best = rankings[0]
+            best_agent = best['agent_name']
             
             # Find worst performing active agent
-            for ranking in reversed(rankings):
-                if ranking['agent_name'] in current_agents:
-                    worst_active_agent = ranking['agent_name']
-                    break
+            worst_active = next(
+                (r for r in reversed(rankings) if r['agent_name'] in current_agents), None
+            )
             
             # Check if rotation is beneficial
-            if worst_active_agent and best_agent not in current_agents:
-                best_score = rankings[0]['composite_score']
-                worst_score = next(r['composite_score'] for r in rankings 
-                                 if r['agent_name'] == worst_active_agent)
-                
-                improvement = best_score - worst_score
+            if worst_active and best_agent not in current_agents:
+                worst_active_agent = worst_active['agent_name']
+                improvement = best['composite_score'] - worst_active['composite_score']
                 
                 # Only rotate if improvement is significant
                 if improvement > 0.1:  # 10% improvement threshold
@@ -403,51 +618,27 @@ class MetaEvaluationService:
     async def _analyze_market_regime(self) -> Dict[str, Any]:
         """Analyze current market regime."""
         try:
-            # Get real market data
-            ticker = yf.Ticker('SPY')
-            hist = ticker.history(period="30d", interval="1d")
+            snapshot = await self._compute_regime_snapshot()
             
-            if not hist.empty:
-                # Calculate regime indicators
-                returns = hist['Close'].pct_change().dropna()
-                volatility = returns.std() * np.sqrt(252)
-                trend = (hist['Close'].iloc[-1] / hist['Close'].iloc[0]) - 1
-                
-                # Volume analysis
-                avg_volume = hist['Volume'].mean()
-                recent_volume = hist['Volume'].tail(5).mean()
-                volume_ratio = recent_volume / avg_volume if avg_volume > 0 else 1.0
-                
-                # Determine regime
-                if volatility > 0.25:
-                    regime = 'volatile'
-                    confidence = min(0.95, volatility * 2)
-                elif trend > 0.05:
-                    regime = 'bull'
-                    confidence = min(0.95, abs(trend) * 10)
-                elif trend < -0.05:
-                    regime = 'bear'
-                    confidence = min(0.95, abs(trend) * 10)
-                elif abs(trend) < 0.02:
-                    regime = 'neutral'
-                    confidence = 0.8
-                else:
-                    regime = 'trending'
-                    confidence = min(0.95, abs(trend) * 8)
+            if snapshot:
+                # Simulated RSI, MACD and Bollinger position
+                rsi, macd, bollinger_position = self._rng.uniform(
+                    [30, -0.02, 0.2], [70, 0.02, 0.8]
+                ).tolist()
                 
                 return {
-                    'regime': regime,
-                    'confidence': confidence,
-                    'volatility': float(volatility),
-                    'trend_strength': float(abs(trend)),
-                    'volume_ratio': float(volume_ratio),
-                    'trend_direction': 'up' if trend > 0 else 'down',
+                    'regime': snapshot.regime,
+                    'confidence': snapshot.confidence,
+                    'volatility': snapshot.volatility,
+                    'trend_strength': abs(snapshot.trend),
+                    'volume_ratio': snapshot.volume_ratio,
+                    'trend_direction': 'up' if snapshot.trend > 0 else 'down',
                     'market_indicators': {
-                        'rsi': random.uniform(30, 70),  # Simulated RSI
-                        'macd': random.uniform(-0.02, 0.02),  # Simulated MACD
-                        'bollinger_position': random.uniform(0.2, 0.8)  # Simulated Bollinger position
+                        'rsi': rsi,
+                        'macd': macd,
+                        'bollinger_position': bollinger_position
                     },
-                    'timestamp': datetime.now()
+                    'timestamp': snapshot.timestamp
                 }
             else:
                 return self._get_fallback_regime_analysis()
@@ -473,22 +664,24 @@ class MetaEvaluationService:
             'timestamp': datetime.now()
         }
     
-    async def _store_agent_performance(self, performance: AgentPerformance):
-        """Store agent performance in database."""
+    async def _store_agent_performances(self, performances: List[AgentPerformance]):
+        """Store a batch of agent performance records in database."""
         try:
-            async with self.db_pool.acquire() as conn:
-                await conn.execute("""
+            rows = [
+                (
+                    p.agent_name, p.accuracy, p.sharpe_ratio, p.total_return,
+                    p.max_drawdown, p.win_rate, p.confidence, p.response_time,
+                    p.regime, p.timestamp
+                ) for p in performances
+            ]
+            async with self._acquire() as conn:
+                await conn.executemany("""
                     INSERT INTO meta_agent_performance (
                         agent_name, accuracy, sharpe_ratio, total_return,
                         max_drawdown, win_rate, confidence, response_time,
                         regime, created_at
                     ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                """, 
-                    performance.agent_name, performance.accuracy, performance.sharpe_ratio,
-                    performance.total_return, performance.max_drawdown, performance.win_rate,
-                    performance.confidence, performance.response_time, performance.regime,
-                    performance.timestamp
-                )
+                """, rows)
                 
         except Exception as e:
             logger.error(f"Error storing agent performance: {e}")
@@ -496,35 +689,60 @@ class MetaEvaluationService:
     async def _store_agent_rankings(self, rankings: List[Dict[str, Any]], regime: str):
         """Store agent rankings in database."""
         try:
-            async with self.db_pool.acquire() as conn:
-                # Clear old rankings for this regime
-                await conn.execute("""
-                    DELETE FROM meta_agent_rankings 
-                    WHERE regime = $1
-                """, regime)
-                
-                # Insert new rankings
-                for ranking in rankings:
+            now = datetime.now()
+            rows = [
+                (
+                    r['agent_name'], regime, r['rank'], r['composite_score'],
+                    r['accuracy'], r['sharpe_ratio'], r['total_return'],
+                    r['max_drawdown'], r['win_rate'], r['confidence'],
+                    r['response_time'], now
+                ) for r in rankings
+            ]
+            async with self._acquire() as conn:
+                async with conn.transaction():
+                    # Drop agents that are no longer ranked for this regime
                     await conn.execute("""
+                        DELETE FROM meta_agent_rankings 
+                        WHERE regime = $1 
+                        AND agent_name <> ALL($2::text[])
+                    """, regime, [r['agent_name'] for r in rankings])
+                    
+                    # Update rankings in place
+                    await conn.executemany("""
                         INSERT INTO meta_agent_rankings (
                             agent_name, regime, rank, composite_score,
                             accuracy, sharpe_ratio, total_return, max_drawdown,
                             win_rate, confidence, response_time, created_at
                         ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12)
-                    """,
-                        ranking['agent_name'], regime, ranking['rank'], ranking['composite_score'],
-                        ranking['accuracy'], ranking['sharpe_ratio'], ranking['total_return'],
-                        ranking['max_drawdown'], ranking['win_rate'], ranking['confidence'],
-                        ranking['response_time'], datetime.now()
-                    )
-                
+                        ON CONFLICT (agent_name, regime) DO UPDATE SET
+                            rank = EXCLUDED.rank,
+                            composite_score = EXCLUDED.composite_score,
+                            accuracy = EXCLUDED.accuracy,
+                            sharpe_ratio = EXCLUDED.sharpe_ratio,
+                            total_return = EXCLUDED.total_return,
+                            max_drawdown = EXCLUDED.max_drawdown,
+                            win_rate = EXCLUDED.win_rate,
+                            confidence = EXCLUDED.confidence,
+                            response_time = EXCLUDED.response_time,
+                            created_at = EXCLUDED.created_at
+                    """, rows)
+                
+        except asyncpg.exceptions.InvalidColumnReferenceError as e:
+            # ON CONFLICT needs the unique index from migrations/add_meta_rankings_unique.sql
+            if not self._rankings_index_error_logged:
+                self._rankings_index_error_logged = True
+                logger.error(
+                    "Cannot store agent rankings: meta_agent_rankings is missing the unique index "
+                    "idx_meta_agent_rankings_agent_regime on (agent_name, regime); apply "
+                    f"migrations/add_meta_rankings_unique.sql ({e})"
+                )
         except Exception as e:
             logger.error(f"Error storing agent rankings: {e}")
     
     async def _store_rotation_decision(self, decision: RotationDecision):
         """Store rotation decision in database."""
         try:
-            async with self.db_pool.acquire() as conn:
+            async with self._acquire() as conn:
                 await conn.execute("""
                     INSERT INTO meta_rotation_decisions (
                         decision_id, from_agent, to_agent, reason,
@@ -542,7 +760,7 @@ class MetaEvaluationService:
     async def _store_regime_analysis(self, analysis: Dict[str, Any]):
         """Store regime analysis in database."""
         try:
-            async with self.db_pool.acquire() as conn:
+            async with self._acquire() as conn:
                 await conn.execute("""
                     INSERT INTO meta_regime_analysis (
                         regime, confidence, volatility, trend_strength,
@@ -560,73 +778,71 @@ class MetaEvaluationService:
     async def get_meta_evaluation_summary(self) -> Dict[str, Any]:
         """Get meta-evaluation summary."""
         try:
-            async with self.db_pool.acquire() as conn:
-                # Get latest regime analysis
-                regime_analysis = await conn.fetchrow("""
-                    SELECT * FROM meta_regime_analysis 
-                    ORDER BY created_at DESC 
-                    LIMIT 1
-                """)
-                
-                # Get latest rankings for current regime
-                current_regime = regime_analysis['regime'] if regime_analysis else 'neutral'
-                rankings = await conn.fetch("""
-                    SELECT * FROM meta_agent_rankings 
-                    WHERE regime = $1 
-                    ORDER BY rank ASC 
-                    LIMIT 10
-                """, current_regime)
-                
-                # Get recent rotation decisions
-                recent_rotations = await conn.fetch("""
-                    SELECT * FROM meta_rotation_decisions 
-                    ORDER BY created_at DESC 
-                    LIMIT 5
-                """)
-                
-                # Get performance summary
-                performance_summary = await conn.fetch("""
-                    SELECT 
-                        COUNT(DISTINCT agent_name) as total_agents,
-                        AVG(accuracy) as avg_accuracy,
-                        AVG(sharpe_ratio) as avg_sharpe_ratio,
-                        AVG(total_return) as avg_total_return,
-                        AVG(response_time) as avg_response_time
-                    FROM meta_agent_performance 
-                    WHERE created_at >= NOW() - INTERVAL '24 hours'
+            async with self._acquire() as conn:
+                # Build the whole summary document in one round-trip
+                summary_json = await conn.fetchval("""
+                    WITH r AS (
+                        SELECT regime, confidence FROM meta_regime_analysis 
+                        ORDER BY created_at DESC 
+                        LIMIT 1
+                    ), rk AS (
+                        SELECT agent_name, rank, composite_score, accuracy
+                        FROM meta_agent_rankings 
+                        WHERE regime = COALESCE((SELECT regime FROM r), 'neutral') 
+                        ORDER BY rank ASC 
+                        LIMIT 10
+                    ), rot AS (
+                        SELECT decision_id, from_agent, to_agent, reason, confidence, created_at
+                        FROM meta_rotation_decisions 
+                        ORDER BY created_at DESC 
+                        LIMIT 5
+                    ), ps AS (
+                        SELECT 
+                            COUNT(DISTINCT agent_name) as total_agents,
+                            AVG(accuracy) as avg_accuracy,
+                            AVG(sharpe_ratio) as avg_sharpe_ratio,
+                            AVG(total_return) as avg_total_return,
+                            AVG(response_time) as avg_response_time
+                        FROM meta_agent_performance 
+                        WHERE created_at >= NOW() - INTERVAL '24 hours'
+                    )
+                    SELECT json_build_object(
+                        'current_regime', COALESCE((SELECT regime FROM r), 'neutral'),
+                        'regime_confidence', COALESCE((SELECT confidence FROM r), 0.0)::float8,
+                        'top_agents', COALESCE((
+                            SELECT json_agg(json_build_object(
+                                'agent_name', agent_name,
+                                'rank', rank,
+                                'composite_score', composite_score::float8,
+                                'accuracy', accuracy::float8
+                            ) ORDER BY rank) FROM rk
+                        ), '[]'::json),
+                        'recent_rotations', COALESCE((
+                            SELECT json_agg(json_build_object(
+                                'decision_id', decision_id,
+                                'from_agent', from_agent,
+                                'to_agent', to_agent,
+                                'reason', reason,
+                                'confidence', confidence::float8,
+                                'created_at', created_at
+                            ) ORDER BY created_at DESC) FROM rot
+                        ), '[]'::json),
+                        'performance_summary', (
+                            SELECT json_build_object(
+                                'total_agents', total_agents,
+                                'avg_accuracy', COALESCE(avg_accuracy, 0.0)::float8,
+                                'avg_sharpe_ratio', COALESCE(avg_sharpe_ratio, 0.0)::float8,
+                                'avg_total_return', COALESCE(avg_total_return, 0.0)::float8,
+                                'avg_response_time', COALESCE(avg_response_time, 0.0)::float8
+                            ) FROM ps
+                        )
+                    )
                 """)
-                
-                return {
-                    'current_regime': current_regime,
-                    'regime_confidence': float(regime_analysis['confidence']) if regime_analysis else 0.0,
-                    'top_agents': [
-                        {
-                            'agent_name': r['agent_name'],
-                            'rank': r['rank'],
-                            'composite_score': float(r['composite_score']),
-                            'accuracy': float(r['accuracy'])
-                        } for r in rankings
-                    ],
-                    'recent_rotations': [
-                        {
-                            'decision_id': r['decision_id'],
-                            'from_agent': r['from_agent'],
-                            'to_agent': r['to_agent'],
-                            'reason': r['reason'],
-                            'confidence': float(r['confidence']),
-                            'created_at': r['created_at'].isoformat()
-                        } for r in recent_rotations
-                    ],
-                    'performance_summary': {
-                        'total_agents': performance_summary[0]['total_agents'] if performance_summary else 0,
-                        'avg_accuracy': float(performance_summary[0]['avg_accuracy']) if performance_summary and performance_summary[0]['avg_accuracy'] else 0.0,
-                        'avg_sharpe_ratio': float(performance_summary[0]['avg_sharpe_ratio']) if performance_summary and performance_summary[0]['avg_sharpe_ratio'] else 0.0,
-                        'avg_total_return': float(performance_summary[0]['avg_total_return']) if performance_summary and performance_summary[0]['avg_total_return'] else 0.0,
-                        'avg_response_time': float(performance_summary[0]['avg_response_time']) if performance_summary and performance_summary[0]['avg_response_time'] else 0.0
-                    },
-                    'last_updated': datetime.now().isoformat()
-                }
-                
+            
+            summary = json.loads(summary_json)
+            summary['last_updated'] = datetime.now().isoformat()
+            return summary
+            
         except Exception as e:
             logger.error(f"Error getting meta-evaluation summary: {e}")
             return {